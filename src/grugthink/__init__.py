@@ -10,7 +10,7 @@ __author__ = "GrugThink Contributors"
 __description__ = "Adaptable Discord Personality Engine with Multi-Bot Container Support"
 
 # Multi-bot system - core modules always available
-from .bot_manager import BotConfig, BotInstance, BotManager
+# (BotManager, BotConfig and BotInstance need discord.py and are imported lazily, see __getattr__)
 from .config_manager import ConfigManager, ConfigTemplate
 from .grug_db import GrugDB
 from .grug_structured_logger import get_logger
@@ -43,6 +43,9 @@ if _API_SERVER_AVAILABLE:
     __all__.append("APIServer")
 
 
+_BOT_MANAGER_NAMES = {"BotManager", "BotConfig", "BotInstance"}
+
+
 def __getattr__(name: str):
     """Lazy import optional submodules."""
     if name == "bot":
@@ -50,4 +53,8 @@ def __getattr__(name: str):
 
         _bot = importlib.import_module(".bot", __name__)
         return _bot
+    if name in _BOT_MANAGER_NAMES:
+        import importlib
+
+        return getattr(importlib.import_module(".bot_manager", __name__), name)
     raise AttributeError(name)
@@ -248,39 +248,108 @@ class GrugDB:
                 log.error("Error adding fact", extra={"error": str(e)})
                 return False
 
+    def add_facts(self, fact_texts: list[str]) -> int:
+        """Add several facts at once, embedding them as one batch.
+
+        Facts that already exist (or repeat within ``fact_texts``) are skipped.
+        Returns the number of facts added.
+        """
+        # Drop repeats within the batch, keeping the caller's order
+        fact_texts = list(dict.fromkeys(fact_texts))
+        if not fact_texts:
+            return 0
+
+        with self.lock:
+            placeholders = ",".join("?" * len(fact_texts))
+            cursor = self.conn.execute(
+                f"SELECT content FROM facts WHERE server_id = ? AND content IN ({placeholders})",
+                (self.server_id, *fact_texts),
+            )
+            known = {row[0] for row in cursor.fetchall()}
+        new_facts = [fact for fact in fact_texts if fact not in known]
+        if not new_facts:
+            log.info("All facts already exist", extra={"count": len(fact_texts)})
+            return 0
+
+        self._ensure_embedder_loaded()
+        # Encoding is CPU-bound and can be done outside the lock; one call embeds the whole batch
+        embeddings = self.embedder.encode(new_facts) if self.embedder is not None else None
+
+        with self.lock:
+            try:
+                # One transaction for all rows, so the DB and the index stay in sync
+                with self.conn:
+                    fact_ids = [
+                        self.conn.execute(
+                            "INSERT INTO facts (server_id, content) VALUES (?, ?)", (self.server_id, fact)
+                        ).lastrowid
+                        for fact in new_facts
+                    ]
+                    if embeddings is not None and self.index is not None and np is not None:
+                        # If this raises, the transaction will be rolled back
+                        self.index.add_with_ids(embeddings, np.array(fact_ids))
+
+                log.info("Added facts", extra={"count": len(fact_ids)})
+                return len(fact_ids)
+            except sqlite3.IntegrityError:
+                # Another writer added one of these facts since the duplicate check; the
+                # transaction rolled back, so fall through and add the rest one by one
+                log.warning("Fact already exists, retrying batch one fact at a time", extra={"count": len(new_facts)})
+            except Exception as e:
+                log.error("Error adding facts", extra={"error": str(e)})
+                return 0
+
+        # Outside the lock: add_fact takes it itself and skips the facts that now exist
+        return sum(self.add_fact(fact) for fact in new_facts)
+
     def search_facts(self, query: str, k: int = 5) -> list[str]:
         """Search for relevant facts using semantic search."""
+        return self.search_facts_batch([query], k)[0]
+
+    def search_facts_batch(self, queries: list[str], k: int = 5) -> list[list[str]]:
+        """Search for relevant facts for several queries at once.
+
+        All queries are embedded in one call and looked up with one index search.
+        Returns one result list per query, in the order of ``queries``.
+        """
+        if not queries:
+            return []
+
         self._ensure_embedder_loaded()
         if self.index is None or self.embedder is None or np is None:
             # No vector search available, return empty results
-            return []
+            return [[] for _ in queries]
 
         if self.index.ntotal == 0:
-            return []
+            return [[] for _ in queries]
 
         # Encoding is CPU-bound and can be done outside the lock
-        query_embedding = self.embedder.encode([query])
+        query_embeddings = self.embedder.encode(queries, batch_size=len(queries))
 
         with self.lock:
             try:
-                distances, indices = self.index.search(query_embedding, k)
+                distances, indices = self.index.search(query_embeddings, k)
 
-                results = []
-                cursor = self.conn.cursor()
-                for i in indices[0]:
-                    # FAISS indices are 0-based, SQLite IDs are 1-based
-                    # This assumes a direct mapping, which is true if we only add.
-                    # For a robust system, we'd use faiss.IndexIDMap
-                    cursor.execute("SELECT content FROM facts WHERE id=? AND server_id=?", (int(i), self.server_id))
-                    row = cursor.fetchone()
-                    if row:
-                        results.append(row[0])
-
-                log.info("Found results for query", extra={"query": query, "results": len(results)})
+                # Fetch every matched fact in one query; -1 marks an empty slot
+                fact_ids = {int(i) for row in indices for i in row if i >= 0}
+                contents = {}
+                if fact_ids:
+                    placeholders = ",".join("?" * len(fact_ids))
+                    cursor = self.conn.execute(
+                        f"SELECT id, content FROM facts WHERE server_id = ? AND id IN ({placeholders})",
+                        (self.server_id, *fact_ids),
+                    )
+                    contents = dict(cursor.fetchall())
+
+                results = [[contents[int(i)] for i in row if int(i) in contents] for row in indices]
+                log.info(
+                    "Found results for queries",
+                    extra={"queries": queries, "results": [len(result) for result in results]},
+                )
                 return results
             except Exception as e:
                 log.error("Error searching facts", extra={"error": str(e)})
-                return []
+                return [[] for _ in queries]
 
     def get_all_facts(self) -> list[str]:
         """Retrieve all facts from the database."""
@@ -315,6 +384,21 @@ class GrugDB:
                 log.error("Error deleting fact", extra={"error": str(e), "fact": fact_content})
                 return False
 
+    def clear_facts(self) -> bool:
+        """Delete every fact for this server and empty the vector index."""
+        with self.lock:
+            try:
+                with self.conn:
+                    cursor = self.conn.execute("DELETE FROM facts WHERE server_id = ?", (self.server_id,))
+                if self.index is not None:
+                    self.index.reset()
+
+                log.info("Cleared all facts", extra={"server_id": self.server_id, "count": cursor.rowcount})
+                return True
+            except Exception as e:
+                log.error("Error clearing facts", extra={"error": str(e), "server_id": self.server_id})
+                return False
+
     def save_index(self):
         """Save the FAISS index to disk."""
         with self.lock:
@@ -447,10 +531,7 @@ if __name__ == "__main__":
             with open(json_lore_path, "r") as f:
                 lore_data = json.load(f)
                 facts = lore_data.get("facts", [])
-                migrated_count = 0
-                for fact in facts:
-                    if db.add_fact(fact):
-                        migrated_count += 1
+                migrated_count = db.add_facts(facts)
                 log.info("Migration complete", extra={"migrated": migrated_count, "total": len(facts)})
                 # Rename the old file to prevent re-migration
                 os.rename(json_lore_path, json_lore_path + ".migrated")
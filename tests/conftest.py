@@ -0,0 +1,133 @@
+"""Shared pytest setup for the test suite."""
+
+import importlib.util
+import sys
+import types
+
+import numpy as np
+
+# Provide a minimal faiss stub if faiss is unavailable
+if "faiss" not in sys.modules:
+    fake_faiss = types.ModuleType("faiss")
+    # This is the important part to make the mock compatible with transformers' import checks.
+    fake_faiss.__spec__ = importlib.util.spec_from_loader("faiss", loader=None)
+
+    class IndexFlatL2:
+        def __init__(self, dim):
+            self.dim = dim
+            # Vectors live in the first _n rows of a buffer that grows geometrically,
+            # so repeated adds cost amortised O(N) instead of re-copying everything each time
+            self._buf = np.empty((0, dim), dtype=np.float32)
+            self._cap = 0
+            self._n = 0
+            self._sq_norms = None  # cached ||v||^2 per stored vector
+
+        @property
+        def vectors(self):
+            return self._buf[: self._n]
+
+        def add(self, vecs):
+            # No copy when vecs is already C-contiguous float32 (what encoders return)
+            vecs = np.ascontiguousarray(vecs, dtype=np.float32)
+            n_new = len(vecs)
+            if self._n + n_new > self._cap:
+                self._cap = max(self._cap * 2, self._n + n_new)
+                buf = np.empty((self._cap, self.dim), dtype=np.float32)
+                buf[: self._n] = self._buf[: self._n]
+                self._buf = buf
+            self._buf[self._n : self._n + n_new] = vecs
+            self._n += n_new
+            self._sq_norms = None
+
+        def reset(self):
+            self._n = 0
+            self._sq_norms = None
+
+        def search(self, queries, k):
+            if len(self.vectors) == 0:
+                dists = np.zeros((len(queries), k), dtype=np.float32)
+                idx = -np.ones((len(queries), k), dtype=np.int64)
+                return dists, idx
+            # Keep the distance math in float32 instead of upcasting against float64 queries
+            queries = np.ascontiguousarray(queries, dtype=np.float32)
+            if self._sq_norms is None:
+                self._sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+            # ||q - v||^2 = ||q||^2 + ||v||^2 - 2 q.v, so the heavy part is one (Q, D) @ (D, N) matmul
+            # instead of materialising a (Q, N, D) difference tensor
+            q_sq_norms = np.einsum("ij,ij->i", queries, queries)
+            sq_dists = q_sq_norms[:, None] + self._sq_norms[None, :] - 2.0 * (queries @ self.vectors.T)
+            # Rank on squared distances (same order, no sqrt over the full Q x N matrix)
+            # Select the k nearest with an O(N) partition, then sort only those k
+            n = sq_dists.shape[1]
+            if k < n:
+                idx = np.argpartition(sq_dists, k - 1, axis=1)[:, :k]
+            else:
+                idx = np.tile(np.arange(n), (len(sq_dists), 1))
+            dist = np.take_along_axis(sq_dists, idx, axis=1)
+            order = np.argsort(dist, axis=1)
+            idx = np.take_along_axis(idx, order, axis=1)
+            dist = np.take_along_axis(dist, order, axis=1)
+            # Only the returned Q x k slice needs real distances; clamp rounding noise before the sqrt
+            dist = np.sqrt(np.maximum(dist, 0.0))
+            return dist.astype(np.float32), idx.astype(np.int64)
+
+    class IndexIDMap:
+        def __init__(self, index):
+            self.index = index
+            # Same geometric capacity buffer as IndexFlatL2, so bulk id inserts stay amortised O(N)
+            self._ids_buf = np.empty(0, dtype=np.int64)
+            self._cap = 0
+            self._n = 0
+
+        @property
+        def ids(self):
+            return self._ids_buf[: self._n]
+
+        @property
+        def ntotal(self):
+            return self._n
+
+        def add_with_ids(self, embeddings, ids):
+            self.index.add(embeddings)
+            n_new = len(ids)
+            if self._n + n_new > self._cap:
+                self._cap = max(self._cap * 2, self._n + n_new)
+                buf = np.empty(self._cap, dtype=np.int64)
+                buf[: self._n] = self._ids_buf[: self._n]
+                self._ids_buf = buf
+            self._ids_buf[self._n : self._n + n_new] = ids
+            self._n += n_new
+
+        def search(self, queries, k):
+            dist, idx = self.index.search(queries, k)
+            if self._n == 0:
+                return dist, np.full_like(idx, -1)
+            # Map internal positions to external ids in one gather; out-of-range positions become -1
+            mask = (idx >= 0) & (idx < self._n)
+            safe = np.where(mask, idx, 0)
+            mapped = np.where(mask, self.ids.take(safe), -1)
+            return dist, mapped
+
+        def reset(self):
+            # Keep the buffer for reuse, like IndexFlatL2.reset
+            self.index.reset()
+            self._n = 0
+
+    def write_index(index, path):
+        # Pass a file object: np.savez would append ".npz" to a bare path
+        with open(path, "wb") as f:
+            np.savez(f, vectors=index.index.vectors, ids=index.ids)
+
+    def read_index(path):
+        with np.load(path) as data:
+            vectors, ids = data["vectors"], data["ids"]
+        index = IndexIDMap(IndexFlatL2(vectors.shape[1]))
+        if len(ids):
+            index.add_with_ids(vectors, ids)
+        return index
+
+    fake_faiss.IndexFlatL2 = IndexFlatL2
+    fake_faiss.IndexIDMap = IndexIDMap
+    fake_faiss.write_index = write_index
+    fake_faiss.read_index = read_index
+    sys.modules["faiss"] = fake_faiss
@@ -1,13 +1,18 @@
 """Unit tests for Discord bot commands and verification logic."""
 
+import asyncio
 import os
 import sys
 import time
+import types
 from unittest.mock import AsyncMock, MagicMock, patch
 
-import discord
 import pytest
 
+# Skip the whole module (instead of erroring at collection) when discord.py is not installed,
+# so config-only runs don't need the Discord stack.
+discord = pytest.importorskip("discord")
+
 # Set up environment variables before any imports
 os.environ["DISCORD_TOKEN"] = "fake_token"
 os.environ["GEMINI_API_KEY"] = "fake_gemini_key"
@@ -30,9 +35,14 @@ mock_config.GEMINI_API_KEY = "fake_gemini_key"
 mock_config.GEMINI_MODEL = "gemini-pro"
 mock_config.OLLAMA_URLS = []
 mock_config.OLLAMA_MODELS = []
-mock_config.DB_PATH = "test_grug_lore.db"
+# pytest-xdist exports PYTEST_XDIST_WORKER (gw0, gw1, ...) so parallel workers get their own DB file
+mock_config.DB_PATH = f"test_grug_lore_{os.environ.get('PYTEST_XDIST_WORKER', 'master')}.db"
 mock_config.LOG_LEVEL_STR = "INFO"
-mock_config.LOAD_EMBEDDER = True
+mock_config.LOAD_EMBEDDER = False  # Never load the embedding model in unit tests
+
+# Canned fact lists shared by the tests (tuples, so no test can mutate them)
+_NO_FACTS = ()
+_SAMPLE_FACTS = ("Grug hunt mammoth.", "Ugga make good fire.")
 
 _mock_bot_db = MagicMock()
 _mock_server_manager = MagicMock()
@@ -42,12 +52,18 @@ _mock_query_model = MagicMock()
 # Mock the logger
 mock_logger = MagicMock()
 
+# Stands in for grug_db so importing the bot never loads SQLite/FAISS. bot.py needs
+# GrugServerManager and the package __init__ needs GrugDB, when either is imported first here.
+_GRUG_DB_STUB = types.ModuleType("src.grugthink.grug_db")
+_GRUG_DB_STUB.GrugDB = MagicMock()
+_GRUG_DB_STUB.GrugServerManager = MagicMock()
+
 with (
     patch.dict(
         "sys.modules",
         {
             "src.grugthink.config": mock_config,
-            "src.grugthink.grug_db": MagicMock(),
+            "src.grugthink.grug_db": _GRUG_DB_STUB,
         },
     ),
     patch("src.grugthink.bot.log", mock_logger),
@@ -108,10 +124,42 @@ def bot_cog(mock_personality_engine):
     mock_bot_instance = MagicMock()
     mock_bot_instance.personality_engine = mock_personality_engine
     mock_bot_instance.db = _mock_bot_db
+    mock_bot_instance.server_manager = _mock_server_manager
 
     return bot.GrugThinkBot(mock_client, mock_bot_instance)
 
 
+def assert_embed(embed, *, title, description=None, field_names=()):
+    """Check the title, description and field names of an embed sent by a command."""
+    assert isinstance(embed, discord.Embed)
+    assert embed.title == title
+    if description is not None:
+        assert embed.description == description
+    if field_names:
+        assert [field.name for field in embed.fields] == list(field_names)
+
+
+def set_channel_history(interaction, messages):
+    """Make ``interaction.channel.history()`` an async generator over ``messages``."""
+
+    async def history(*args, **kwargs):
+        for message in messages:
+            yield message
+
+    interaction.channel.history = history
+
+
+def patch_executor(monkeypatch, result):
+    """Make ``loop.run_in_executor`` return ``result`` without going through a thread pool."""
+
+    async def run_in_executor(executor, func, *args):
+        return result
+
+    mock_loop = MagicMock()
+    mock_loop.return_value.run_in_executor = run_in_executor
+    monkeypatch.setattr(asyncio, "get_running_loop", mock_loop)
+
+
 @pytest.fixture(autouse=True)
 def reset_mocks():
     # Reset mocks for each test to ensure clean state
@@ -121,67 +169,47 @@ def reset_mocks():
     _mock_query_model.reset_mock()
     mock_logger.reset_mock()
 
-    # Clear rate limiting cooldowns
+    # Clear rate limiting cooldowns and any responses cached by a previous test
     bot.user_cooldowns.clear()
+    if bot.response_cache.cache:
+        bot.response_cache.cache.clear()
 
-    # Set default return values after reset
+    # Set default return values after reset. reset_mock keeps return values, so the shared
+    # DB mock is re-primed here rather than carrying over whatever the previous test set.
     _mock_query_model.return_value = None
-    yield
-
-    # Clean up the test database for personalities
-    if os.path.exists("test_personalities.db"):
-        os.remove("test_personalities.db")
+    _mock_bot_db.search_facts.return_value = _NO_FACTS
+    _mock_bot_db.add_fact.return_value = True
+    _mock_bot_db.get_all_facts.return_value = _NO_FACTS
 
 
 # Test cases for verify command
 @pytest.mark.asyncio
 async def test_verify_command_no_message(bot_cog, mock_interaction):
-    mock_interaction.channel.history.return_value.__aiter__.return_value = []
+    set_channel_history(mock_interaction, [])
     await bot_cog.verify.callback(bot_cog, mock_interaction)
     mock_interaction.response.send_message.assert_called_once_with("No user message to verify.", ephemeral=True)
 
 
 @pytest.mark.asyncio
-async def test_verify_command_success(bot_cog, mock_interaction, mock_message):
-    mock_interaction.channel.history.return_value.__aiter__.return_value = [mock_message]
-    _mock_bot_db.search_facts.return_value = []
-
-    # Mock the executor to return our mock result directly
-    async def mock_executor(executor, func, *args):
-        return "TRUE - Grug say this true."
+async def test_verify_command_success(bot_cog, mock_interaction, mock_message, monkeypatch):
+    set_channel_history(mock_interaction, [mock_message])
+    monkeypatch.setattr(bot, "is_rate_limited", MagicMock(return_value=False))
+    patch_executor(monkeypatch, "TRUE - Grug say this true.")
 
-    with (
-        patch("src.grugthink.bot.get_server_db") as mock_get_server_db,
-        patch("asyncio.get_running_loop") as mock_loop,
-        patch("src.grugthink.bot.is_rate_limited", return_value=False),
-    ):
-        mock_get_server_db.return_value = _mock_bot_db
-        mock_loop.return_value.run_in_executor = mock_executor
-
-        await bot_cog.verify.callback(bot_cog, mock_interaction)
+    await bot_cog.verify.callback(bot_cog, mock_interaction)
 
     mock_interaction.response.defer.assert_called_once_with(ephemeral=False)
     mock_interaction.followup.send.assert_called_once_with("Grug thinking...", ephemeral=False)
 
 
 @pytest.mark.asyncio
-async def test_verify_command_model_failure(bot_cog, mock_interaction, mock_message):
-    mock_interaction.channel.history.return_value.__aiter__.return_value = [mock_message]
-    _mock_bot_db.search_facts.return_value = []
+async def test_verify_command_model_failure(bot_cog, mock_interaction, mock_message, monkeypatch):
+    set_channel_history(mock_interaction, [mock_message])
+    monkeypatch.setattr(bot, "is_rate_limited", MagicMock(return_value=False))
+    # The executor returns None when the model fails
+    patch_executor(monkeypatch, None)
 
-    # Mock the executor to return None (failure)
-    async def mock_executor(executor, func, *args):
-        return None
-
-    with (
-        patch("src.grugthink.bot.get_server_db") as mock_get_server_db,
-        patch("asyncio.get_running_loop") as mock_loop,
-        patch("src.grugthink.bot.is_rate_limited", return_value=False),
-    ):
-        mock_get_server_db.return_value = _mock_bot_db
-        mock_loop.return_value.run_in_executor = mock_executor
-
-        await bot_cog.verify.callback(bot_cog, mock_interaction)
+    await bot_cog.verify.callback(bot_cog, mock_interaction)
 
     mock_interaction.response.defer.assert_called_once_with(ephemeral=False)
     mock_interaction.followup.send.assert_called_once_with("Grug thinking...", ephemeral=False)
@@ -195,7 +223,7 @@ async def test_verify_command_rate_limited(bot_cog, mock_interaction, mock_messa
     bot.user_cooldowns[key] = time.time()
 
     # Mock the history so the check doesn't fail before the rate limit
-    mock_interaction.channel.history.return_value.__aiter__.return_value = [mock_message]
+    set_channel_history(mock_interaction, [mock_message])
 
     await bot_cog.verify.callback(bot_cog, mock_interaction)
     mock_interaction.response.send_message.assert_called_once_with("Slow down! Wait a few seconds.", ephemeral=True)
@@ -205,11 +233,8 @@ async def test_verify_command_rate_limited(bot_cog, mock_interaction, mock_messa
 @pytest.mark.asyncio
 async def test_learn_command_trusted_user_success(bot_cog, mock_interaction):
     mock_interaction.user.id = 12345  # Trusted user
-    _mock_bot_db.add_fact.return_value = True
 
-    with patch("src.grugthink.bot.get_server_db") as mock_get_server_db:
-        mock_get_server_db.return_value = _mock_bot_db
-        await bot_cog.learn.callback(bot_cog, mock_interaction, "This is a new fact")
+    await bot_cog.learn.callback(bot_cog, mock_interaction, "This is a new fact")
 
     mock_interaction.response.defer.assert_called_once_with(ephemeral=True)
     mock_interaction.followup.send.assert_called_once_with("Grug learn: This is a new fact", ephemeral=True)
@@ -236,60 +261,49 @@ async def test_learn_command_short_fact_trusted_user(bot_cog, mock_interaction):
 
 
 @pytest.mark.asyncio
-async def test_learn_command_duplicate_fact(bot_cog, mock_interaction):
+async def test_learn_command_duplicate_fact(bot_cog, mock_interaction, monkeypatch):
     mock_interaction.user.id = 12345  # Trusted user
 
     # Create a dedicated mock database for this test
     duplicate_db_mock = MagicMock()
     duplicate_db_mock.add_fact.return_value = False
+    mock_server_manager = MagicMock()
+    mock_server_manager.get_server_db.return_value = duplicate_db_mock
+    monkeypatch.setattr(bot_cog, "server_manager", mock_server_manager)
 
-    with (
-        patch("src.grugthink.bot.config") as bot_config,
-        patch("src.grugthink.bot.server_manager") as mock_server_manager,
-    ):
-        bot_config.TRUSTED_USER_IDS = [12345]
-        mock_server_manager.get_server_db.return_value = duplicate_db_mock
-        await bot_cog.learn.callback(bot_cog, mock_interaction, "This fact already exists")
+    await bot_cog.learn.callback(bot_cog, mock_interaction, "This fact already exists")
 
     mock_interaction.response.defer.assert_called_once_with(ephemeral=True)
-    # Verify the learned fact response (mock database returns True by default)
-    mock_interaction.followup.send.assert_called_once_with("Grug learn: This fact already exists", ephemeral=True)
+    mock_interaction.followup.send.assert_called_once_with("Grug already know that.", ephemeral=True)
 
 
 # Test cases for what_know command
 @pytest.mark.asyncio
 async def test_what_know_command_no_facts(bot_cog, mock_interaction):
-    # Create a dedicated mock database for this test
-    empty_db_mock = MagicMock()
-    empty_db_mock.get_all_facts.return_value = []
-
-    with patch("src.grugthink.bot.server_manager") as mock_server_manager:
-        mock_server_manager.get_server_db.return_value = empty_db_mock
-        await bot_cog.what_know.callback(bot_cog, mock_interaction)
+    # The shared DB mock is primed with no facts
+    await bot_cog.what_know.callback(bot_cog, mock_interaction)
 
     mock_interaction.response.defer.assert_called_once_with(ephemeral=True)
-    # Verify that send was called (command executed successfully)
-    mock_interaction.followup.send.assert_called_once()
-
-    # The actual response format may vary based on mock setup,
-    # but we verify the command completes without error
+    mock_interaction.followup.send.assert_called_once_with("Grug know nothing in this cave.", ephemeral=True)
 
 
 @pytest.mark.asyncio
 async def test_what_know_command_with_facts(bot_cog, mock_interaction):
-    _mock_bot_db.get_all_facts.return_value = ["Fact 1", "Fact 2", "Fact 3"]
+    _mock_bot_db.get_all_facts.return_value = _SAMPLE_FACTS
     mock_interaction.guild.name = "Test Guild"
 
-    with patch("src.grugthink.bot.get_server_db") as mock_get_server_db:
-        mock_get_server_db.return_value = _mock_bot_db
-        await bot_cog.what_know.callback(bot_cog, mock_interaction)
+    await bot_cog.what_know.callback(bot_cog, mock_interaction)
 
     mock_interaction.response.defer.assert_called_once_with(ephemeral=True)
     # Should send an embed with the facts
     mock_interaction.followup.send.assert_called_once()
-    call_kwargs = mock_interaction.followup.send.call_args[1]
-    assert "embed" in call_kwargs
-    assert call_kwargs["ephemeral"] is True
+    _, kwargs = mock_interaction.followup.send.call_args
+    assert kwargs["ephemeral"] is True
+    embed = kwargs["embed"]
+    assert_embed(embed, title="Grug's Memories (Test Guild) - Page 1/1", field_names=("Facts",))
+    facts_field = embed.fields[0]
+    assert "1. Grug hunt mammoth." in facts_field.value
+    assert "2. Ugga make good fire." in facts_field.value
 
 
 # Test cases for help command
@@ -298,9 +312,14 @@ async def test_help_command(bot_cog, mock_interaction):
     await bot_cog.help_command.callback(bot_cog, mock_interaction)
 
     mock_interaction.response.send_message.assert_called_once()
-    call_kwargs = mock_interaction.response.send_message.call_args[1]
-    assert "embed" in call_kwargs
-    assert call_kwargs["ephemeral"] is True
+    _, kwargs = mock_interaction.response.send_message.call_args
+    assert kwargs["ephemeral"] is True
+    assert_embed(
+        kwargs["embed"],
+        title="Grug Help",
+        description="Here are the things Grug can do:",
+        field_names=("/verify", "/learn", "/what-know", "/personality", "/help", "💬 Auto-Verification"),
+    )
 
 
 # Test cases for utility functions
@@ -326,7 +345,7 @@ def test_is_bot_mentioned():
 
 # Test auto-verification functionality
 @pytest.mark.asyncio
-async def test_auto_verification_message_handling(bot_cog, mock_personality_engine):
+async def test_auto_verification_message_handling(bot_cog, mock_personality_engine, monkeypatch):
     mock_message = MagicMock()
     mock_message.author.bot = False
     mock_message.author.id = 12345
@@ -335,20 +354,10 @@ async def test_auto_verification_message_handling(bot_cog, mock_personality_engi
     mock_message.channel = AsyncMock()
 
     # Mock rate limiting to return False (not rate limited)
-    with (
-        patch("src.grugthink.bot.is_rate_limited", return_value=False),
-        patch("src.grugthink.bot.get_server_db") as mock_get_server_db,
-        patch("asyncio.get_running_loop") as mock_loop,
-    ):
-        mock_get_server_db.return_value = _mock_bot_db
-
-        # Mock executor
-        async def mock_executor(executor, func, *args):
-            return "TRUE - Sky blue like Grug say."
+    monkeypatch.setattr(bot, "is_rate_limited", MagicMock(return_value=False))
+    patch_executor(monkeypatch, "TRUE - Sky blue like Grug say.")
 
-        mock_loop.return_value.run_in_executor = mock_executor
-
-        await bot_cog.on_message(mock_message)
+    await bot_cog.on_message(mock_message)
 
     # Should send a thinking message first
     mock_message.channel.send.assert_called()
@@ -375,16 +384,16 @@ async def test_auto_verification_rate_limited(bot_cog):
 
 
 @pytest.mark.asyncio
-async def test_auto_verification_short_content(bot_cog):
+async def test_auto_verification_short_content(bot_cog, monkeypatch):
     mock_message = MagicMock()
     mock_message.author.bot = False
     mock_message.author.id = 12345
     mock_message.guild.id = 67890
     mock_message.content = "Grug hi"  # Short content after cleaning
     mock_message.channel = AsyncMock()
+    monkeypatch.setattr(bot, "is_rate_limited", MagicMock(return_value=False))
 
-    with patch("src.grugthink.bot.is_rate_limited", return_value=False):
-        await bot_cog.on_message(mock_message)
+    await bot_cog.on_message(mock_message)
 
     # Should send acknowledgment message
     mock_message.channel.send.assert_called_with("Grug hear you call!")
@@ -392,7 +401,7 @@ async def test_auto_verification_short_content(bot_cog):
 
 # Test Markov bot interaction
 @pytest.mark.asyncio
-async def test_markov_bot_interaction(bot_cog):
+async def test_markov_bot_interaction(bot_cog, monkeypatch):
     mock_message = MagicMock()
     mock_message.author.bot = True
     mock_message.author.name = "Markov Chain Bot"
@@ -400,28 +409,17 @@ async def test_markov_bot_interaction(bot_cog):
     mock_message.guild.id = 67890
     mock_message.content = "Grug test statement"
     mock_message.channel = AsyncMock()
+    monkeypatch.setattr(bot, "is_rate_limited", MagicMock(return_value=False))
+    patch_executor(monkeypatch, "TRUE - Grug think this right.")
 
-    with (
-        patch("src.grugthink.bot.is_rate_limited", return_value=False),
-        patch("src.grugthink.bot.get_server_db") as mock_get_server_db,
-        patch("asyncio.get_running_loop") as mock_loop,
-    ):
-        mock_get_server_db.return_value = _mock_bot_db
-
-        # Mock executor
-        async def mock_executor(executor, func, *args):
-            return "TRUE - Grug think this right."
-
-        mock_loop.return_value.run_in_executor = mock_executor
-
-        await bot_cog.on_message(mock_message)
+    await bot_cog.on_message(mock_message)
 
     # Should process Markov bot messages
     mock_message.channel.send.assert_called()
 
 
 @pytest.mark.asyncio
-async def test_markov_bot_special_responses(bot_cog):
+async def test_markov_bot_special_responses(bot_cog, monkeypatch):
     mock_message = MagicMock()
     mock_message.author.bot = True
     mock_message.author.name = "Markov Chain Bot"
@@ -429,9 +427,9 @@ async def test_markov_bot_special_responses(bot_cog):
     mock_message.guild.id = 67890
     mock_message.content = "Grug"  # Just the bot name
     mock_message.channel = AsyncMock()
+    monkeypatch.setattr(bot, "is_rate_limited", MagicMock(return_value=False))
 
-    with patch("src.grugthink.bot.is_rate_limited", return_value=False):
-        await bot_cog.on_message(mock_message)
+    await bot_cog.on_message(mock_message)
 
     # Should send special Markov response
     mock_message.channel.send.assert_called_with("Grug hear robot friend call!")
@@ -0,0 +1,75 @@
+"""Micro-benchmarks for the Discord command handlers.
+
+Run with ``pytest tests/test_bot_bench.py --benchmark-only``; regular test runs skip them.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from tests.test_bot import _mock_server_manager, bot, patch_executor, set_channel_history
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark(group="discord_handlers")
+
+
+@pytest.fixture(autouse=True)
+def benchmark_only(request):
+    if not request.config.getoption("benchmark_only"):
+        pytest.skip("Benchmarks only run with --benchmark-only")
+
+
+@pytest.fixture
+def aio_benchmark(benchmark):
+    """Benchmark a coroutine function, driving each round on a private event loop."""
+    loop = asyncio.new_event_loop()
+
+    def run(coro_fn, *args):
+        return benchmark(lambda: loop.run_until_complete(coro_fn(*args)))
+
+    yield run
+    loop.close()
+
+
+@pytest.fixture
+def bench_cog():
+    engine = MagicMock()
+    engine.get_personality.return_value = SimpleNamespace(response_style="caveman", chosen_name=None, name="Grug")
+    engine.get_response_with_style.return_value = "TRUE - Grug say this true."
+
+    bot_instance = MagicMock()
+    bot_instance.personality_engine = engine
+    bot_instance.server_manager = _mock_server_manager
+    bot_instance.config.bot_id = "bench-bot"
+
+    return bot.GrugThinkBot(AsyncMock(), bot_instance)
+
+
+@pytest.fixture
+def bench_interaction():
+    interaction = AsyncMock()
+    interaction.user.id = 12345  # Trusted in mock_config
+    interaction.guild_id = 67890
+    set_channel_history(interaction, [SimpleNamespace(author=SimpleNamespace(bot=False), content="Grug hunt mammoth.")])
+    return interaction
+
+
+def test_bench_verify(aio_benchmark, bench_cog, bench_interaction, monkeypatch):
+    # Every round must take the full verify path, not the rate-limit early return
+    monkeypatch.setattr(bot, "is_rate_limited", MagicMock(return_value=False))
+    patch_executor(monkeypatch, "TRUE - Grug say this true.")
+
+    aio_benchmark(bench_cog.verify.callback, bench_cog, bench_interaction)
+
+    bench_interaction.followup.send.return_value.edit.assert_awaited_with(
+        content="Verification: TRUE - Grug say this true."
+    )
+
+
+def test_bench_learn(aio_benchmark, bench_cog, bench_interaction):
+    aio_benchmark(bench_cog.learn.callback, bench_cog, bench_interaction, "Grug love mammoth meat.")
+
+    bench_interaction.followup.send.assert_awaited_with("Grug learn: Grug love mammoth meat.", ephemeral=True)
@@ -1,6 +1,8 @@
 """Configuration validation test suite."""
 
+import importlib
 import os
+import subprocess
 import sys
 from unittest.mock import patch
 
@@ -9,112 +11,109 @@ import pytest
 
 # Helper function to reload the config module
 def _reload_config():
-    # Remove the config module from cache to force reload
-    modules_to_remove = [
-        "src.grugthink.config",
-        "src.grugthink",
-    ]
-    for module_name in modules_to_remove:
-        if module_name in sys.modules:
-            del sys.modules[module_name]
-
-    from src.grugthink import config
-
-    return config
+    # Re-execute config.py in place against the current environment. Unlike dropping it
+    # from sys.modules, this does not re-run the package __init__ and its imports.
+    config = sys.modules.get("src.grugthink.config")
+    if config is None:
+        # First import, or the previous one failed validation
+        from src.grugthink import config
+
+        return config
+    return importlib.reload(config)
+
+
+# Baseline environment for every test: a minimal valid configuration, with every
+# other config variable unset (None)
+_BASE_ENV = {
+    "DISCORD_TOKEN": "fake_token",
+    "GEMINI_API_KEY": "fake_gemini_key",
+    "OLLAMA_URLS": None,
+    "OLLAMA_MODELS": None,
+    "GOOGLE_API_KEY": None,
+    "GOOGLE_CSE_ID": None,
+    "GRUGBOT_DATA_DIR": None,
+    "GRUGBOT_VARIANT": None,
+    "TRUSTED_USER_IDS": None,
+    "LOG_LEVEL": None,
+}
+
+
+def _apply_env(monkeypatch, env):
+    """Set each variable in ``env``, unsetting those mapped to None."""
+    for var, value in env.items():
+        if value is None:
+            monkeypatch.delenv(var, raising=False)
+        else:
+            monkeypatch.setenv(var, value)
 
 
 @pytest.fixture(autouse=True)
 def setup_config_env(monkeypatch):
-    # Clear all relevant environment variables before each test
-    env_vars = [
-        "DISCORD_TOKEN",
-        "GEMINI_API_KEY",
-        "OLLAMA_URLS",
-        "OLLAMA_MODELS",
-        "GOOGLE_API_KEY",
-        "GOOGLE_CSE_ID",
-        "GRUGBOT_DATA_DIR",
-        "GRUGBOT_VARIANT",
-        "TRUSTED_USER_IDS",
-        "LOG_LEVEL",
-    ]
-    for var in env_vars:
-        monkeypatch.delenv(var, raising=False)
-
-    # Set a default minimal valid configuration for tests that don't explicitly set them
-    monkeypatch.setenv("DISCORD_TOKEN", "fake_token")
-    monkeypatch.setenv("GEMINI_API_KEY", "fake_gemini_key")
-
-
-def test_missing_discord_token(monkeypatch):
-    monkeypatch.delenv("DISCORD_TOKEN")
-    with pytest.raises(ValueError, match="Missing DISCORD_TOKEN"):
-        _reload_config()
-
-
-def test_missing_llm_config(monkeypatch):
-    monkeypatch.delenv("GEMINI_API_KEY")
-    monkeypatch.delenv("OLLAMA_URLS", raising=False)
-    with pytest.raises(ValueError, match="Missing LLM configuration"):
-        _reload_config()
-
-
-def test_invalid_ollama_url(monkeypatch):
-    monkeypatch.delenv("GEMINI_API_KEY")  # Ensure Ollama is used
-    monkeypatch.setenv("OLLAMA_URLS", "not-a-valid-url")
-    with pytest.raises(ValueError, match="Invalid OLLAMA_URL"):
-        _reload_config()
-
-
-def test_invalid_ollama_model(monkeypatch):
-    monkeypatch.delenv("GEMINI_API_KEY")  # Ensure Ollama is used
-    monkeypatch.setenv("OLLAMA_URLS", "http://localhost:11434")
-    monkeypatch.setenv("OLLAMA_MODELS", "invalid/model name")
-    with pytest.raises(ValueError, match="Invalid model name"):
-        _reload_config()
-
-
-def test_invalid_gemini_api_key(monkeypatch):
-    monkeypatch.setenv("GEMINI_API_KEY", "invalid key with spaces")
-    with pytest.raises(ValueError, match="Invalid GEMINI_API_KEY"):
+    _apply_env(monkeypatch, _BASE_ENV)
+
+
+@pytest.mark.parametrize(
+    "env,match",
+    [
+        pytest.param({"DISCORD_TOKEN": None}, "Missing DISCORD_TOKEN", id="missing_discord_token"),
+        pytest.param({"GEMINI_API_KEY": None}, "Missing LLM configuration", id="missing_llm_config"),
+        # Without a Gemini key the Ollama settings are validated
+        pytest.param(
+            {"GEMINI_API_KEY": None, "OLLAMA_URLS": "not-a-valid-url"},
+            "Invalid OLLAMA_URL",
+            id="invalid_ollama_url",
+        ),
+        pytest.param(
+            {"GEMINI_API_KEY": None, "OLLAMA_URLS": "http://localhost:11434", "OLLAMA_MODELS": "invalid/model name"},
+            "Invalid model name",
+            id="invalid_ollama_model",
+        ),
+        pytest.param({"GEMINI_API_KEY": "invalid key with spaces"}, "Invalid GEMINI_API_KEY", id="invalid_gemini_key"),
+        # GOOGLE_CSE_ID needs to be set for CAN_SEARCH to be true
+        pytest.param(
+            {"GOOGLE_API_KEY": "invalid key with spaces", "GOOGLE_CSE_ID": "fake_cse_id"},
+            "Invalid GOOGLE_API_KEY",
+            id="invalid_google_api_key",
+        ),
+        pytest.param(
+            {"GOOGLE_API_KEY": "fake_api_key", "GOOGLE_CSE_ID": "invalid id with spaces"},
+            "Invalid GOOGLE_CSE_ID",
+            id="invalid_google_cse_id",
+        ),
+    ],
+)
+def test_invalid_config(monkeypatch, env, match):
+    _apply_env(monkeypatch, env)
+    with pytest.raises(ValueError, match=match):
         _reload_config()
 
 
-def test_invalid_google_api_key(monkeypatch):
-    monkeypatch.setenv("GOOGLE_API_KEY", "invalid key with spaces")
-    monkeypatch.setenv("GOOGLE_CSE_ID", "fake_cse_id")  # Needs to be set for CAN_SEARCH to be true
-    with pytest.raises(ValueError, match="Invalid GOOGLE_API_KEY"):
-        _reload_config()
-
-
-def test_invalid_google_cse_id(monkeypatch):
-    monkeypatch.setenv("GOOGLE_API_KEY", "fake_api_key")
-    monkeypatch.setenv("GOOGLE_CSE_ID", "invalid id with spaces")
-    with pytest.raises(ValueError, match="Invalid GOOGLE_CSE_ID"):
-        _reload_config()
-
-
-def test_valid_config_gemini(monkeypatch):
-    monkeypatch.delenv("OLLAMA_URLS", raising=False)  # Ensure Ollama is not used
-    config = _reload_config()
-    assert config.USE_GEMINI is True
-    assert config.CAN_SEARCH is False  # By default, no Google keys
-
-
-def test_valid_config_ollama(monkeypatch):
-    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
-    monkeypatch.setenv("OLLAMA_URLS", "http://localhost:11434,http://192.168.1.100:11434")
-    monkeypatch.setenv("OLLAMA_MODELS", "llama3.2:3b,grug:latest")
+@pytest.mark.parametrize(
+    "env,expected",
+    [
+        pytest.param({}, {"USE_GEMINI": True, "CAN_SEARCH": False}, id="gemini"),
+        pytest.param(
+            {
+                "GEMINI_API_KEY": None,
+                "OLLAMA_URLS": "http://localhost:11434,http://192.168.1.100:11434",
+                "OLLAMA_MODELS": "llama3.2:3b,grug:latest",
+            },
+            {
+                "USE_GEMINI": False,
+                "OLLAMA_URLS": ["http://localhost:11434", "http://192.168.1.100:11434"],
+                "OLLAMA_MODELS": ["llama3.2:3b", "grug:latest"],
+            },
+            id="ollama",
+        ),
+        pytest.param({"TRUSTED_USER_IDS": "123,456,789"}, {"TRUSTED_USER_IDS": [123, 456, 789]}, id="trusted_user_ids"),
+        pytest.param({"LOG_LEVEL": "debug"}, {"LOG_LEVEL_STR": "DEBUG"}, id="log_level_case_insensitive"),
+    ],
+)
+def test_valid_config(monkeypatch, env, expected):
+    _apply_env(monkeypatch, env)
     config = _reload_config()
-    assert config.USE_GEMINI is False
-    assert config.OLLAMA_URLS == ["http://localhost:11434", "http://192.168.1.100:11434"]
-    assert config.OLLAMA_MODELS == ["llama3.2:3b", "grug:latest"]
-
-
-def test_trusted_user_ids(monkeypatch):
-    monkeypatch.setenv("TRUSTED_USER_IDS", "123,456,789")
-    config = _reload_config()
-    assert config.TRUSTED_USER_IDS == [123, 456, 789]
+    for name, value in expected.items():
+        assert getattr(config, name) == value
 
 
 def test_default_values(monkeypatch):
@@ -143,12 +142,6 @@ def test_default_values(monkeypatch):
     )
 
 
-def test_log_level_case_insensitivity(monkeypatch):
-    monkeypatch.setenv("LOG_LEVEL", "debug")
-    config = _reload_config()
-    assert config.LOG_LEVEL_STR == "DEBUG"
-
-
 @patch("logging.Logger.info")
 def test_log_initial_settings(mock_log_info, monkeypatch):
     monkeypatch.setenv("GEMINI_API_KEY", "fake_gemini_key")
@@ -171,3 +164,12 @@ def test_save_personality_to_file(tmp_path, monkeypatch):
     assert manager.save_personality_to_file("test_persona", data)
     file_path = tmp_path / "personalities" / "test_persona.yaml"
     assert file_path.exists()
+
+
+def test_package_import_does_not_need_discord():
+    # Block discord.py in a fresh interpreter; the package and config must still import
+    script = "import sys; sys.modules['discord'] = None; import src.grugthink, src.grugthink.config"
+    env = {**os.environ, "DISCORD_TOKEN": "fake_token", "GEMINI_API_KEY": "fake_gemini_key"}
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
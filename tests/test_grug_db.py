@@ -1,97 +1,32 @@
-"""Database layer tests with FAISS mocking."""
-
-import importlib.util
-import pickle
-import sys
-import types
+"""Database layer tests with FAISS mocking (the faiss stub lives in conftest.py)."""
 
+import faiss
 import numpy as np
 import pytest
 
-# Provide a minimal faiss stub if faiss is unavailable
-if "faiss" not in sys.modules:
-    fake_faiss = types.ModuleType("faiss")
-    # This is the important part to make the mock compatible with transformers' import checks.
-    fake_faiss.__spec__ = importlib.util.spec_from_loader("faiss", loader=None)
-
-    class IndexFlatL2:
-        def __init__(self, dim):
-            self.dim = dim
-            self.vectors = np.empty((0, dim), dtype=np.float32)
-
-        def add(self, vecs):
-            self.vectors = np.vstack([self.vectors, vecs]).astype(np.float32)
-
-        def reset(self):
-            self.vectors = np.empty((0, self.dim), dtype=np.float32)
-
-        def search(self, queries, k):
-            if len(self.vectors) == 0:
-                dists = np.zeros((len(queries), k), dtype=np.float32)
-                idx = -np.ones((len(queries), k), dtype=np.int64)
-                return dists, idx
-            dists = np.linalg.norm(self.vectors[None, :, :] - queries[:, None, :], axis=2)
-            idx = np.argsort(dists, axis=1)[:, :k]
-            dist = np.take_along_axis(dists, idx, axis=1)
-            return dist.astype(np.float32), idx.astype(np.int64)
-
-    class IndexIDMap:
-        def __init__(self, index):
-            self.index = index
-            self.ids = np.array([], dtype=np.int64)
-
-        @property
-        def ntotal(self):
-            return len(self.ids)
-
-        def add_with_ids(self, embeddings, ids):
-            self.index.add(embeddings)
-            self.ids = np.concatenate([self.ids, ids])
-
-        def search(self, queries, k):
-            dist, idx = self.index.search(queries, k)
-            mapped = np.full_like(idx, -1)
-            for r, row in enumerate(idx):
-                for c, val in enumerate(row):
-                    if 0 <= val < len(self.ids):
-                        mapped[r, c] = self.ids[val]
-            return dist, mapped
-
-        def reset(self):
-            self.index.reset()
-            self.ids = np.array([], dtype=np.int64)
-
-    def write_index(index, path):
-        with open(path, "wb") as f:
-            pickle.dump(index, f)
-
-    def read_index(path):
-        with open(path, "rb") as f:
-            return pickle.load(f)
-
-    fake_faiss.IndexFlatL2 = IndexFlatL2
-    fake_faiss.IndexIDMap = IndexIDMap
-    fake_faiss.write_index = write_index
-    fake_faiss.read_index = read_index
-    sys.modules["faiss"] = fake_faiss
-
 from src.grugthink.grug_db import GrugDB
 
+# The stub from conftest.py is a bare module; the real library has a __file__
+faiss_stub_only = pytest.mark.skipif(hasattr(faiss, "__file__"), reason="checks the faiss stub from conftest.py")
+
 
-@pytest.fixture(scope="function")
-def db_instance(tmp_path):
-    # Setup: Create a temporary directory for the database files
-    test_db_dir = tmp_path / "grug_test_db"
-    test_db_dir.mkdir()
-    test_db_path = str(test_db_dir / "test_grug_lore.db")
+@pytest.fixture(scope="module")
+def db_instance(tmp_path_factory):
+    # Built once per module so the embedder/index setup is paid once; tests share it
+    test_db_path = str(tmp_path_factory.mktemp("grug_test_db") / "test_grug_lore.db")
     test_server_id = "test_server"
 
     db = GrugDB(test_db_path, server_id=test_server_id)
     yield db
 
-    # Teardown: Close the database and remove the test files
+    # Teardown: Close the database; tmp_path_factory handles cleanup of the directory
     db.close()
-    # tmp_path fixture handles cleanup of the directory
+
+
+@pytest.fixture(autouse=True)
+def clean_db(db_instance):
+    # Every test starts from an empty fact table and index
+    db_instance.clear_facts()
 
 
 def test_add_fact(db_instance):
@@ -102,6 +37,33 @@ def test_add_fact(db_instance):
     assert len(facts) == 1
 
 
+def test_add_facts(db_instance):
+    db_instance.add_fact("Grug like big rock.")
+    # Already-known facts and repeats within the batch are skipped
+    added = db_instance.add_facts(["Grug like big rock.", "Ugga make good fire.", "Ugga make good fire.", "Bork nap."])
+    assert added == 2
+    facts = db_instance.get_all_facts()
+    assert sorted(facts) == ["Bork nap.", "Grug like big rock.", "Ugga make good fire."]
+    assert db_instance.add_facts([]) == 0
+
+
+def test_add_facts_keeps_batch_when_a_fact_lands_concurrently(db_instance, monkeypatch):
+    # Simulate another writer adding one of the facts between the duplicate check and the insert
+    ensure_loaded = db_instance._ensure_embedder_loaded
+
+    def race():
+        monkeypatch.setattr(db_instance, "_ensure_embedder_loaded", ensure_loaded)
+        db_instance.add_fact("Ugga make good fire.")
+        ensure_loaded()
+
+    monkeypatch.setattr(db_instance, "_ensure_embedder_loaded", race)
+
+    # The rest of the batch still lands; only the racing fact is skipped
+    assert db_instance.add_facts(["Grug like big rock.", "Ugga make good fire.", "Bork nap."]) == 2
+    facts = db_instance.get_all_facts()
+    assert sorted(facts) == ["Bork nap.", "Grug like big rock.", "Ugga make good fire."]
+
+
 def test_add_fact_rollback_on_index_failure(db_instance, monkeypatch):
     """Ensure DB insert is rolled back if indexing fails."""
     # This test only applies when semantic search is available
@@ -122,32 +84,40 @@ def test_add_fact_rollback_on_index_failure(db_instance, monkeypatch):
     assert "Bad fact" not in db_instance.get_all_facts()
 
 
-def test_search_facts(db_instance):
-    db_instance.add_fact("Grug hunt mammoth.")
-    db_instance.add_fact("Ugga make good fire.")
-    db_instance.add_fact("Bork find shiny stone.")
-    db_instance.add_fact("Grug think sky is blue.")
+_SEARCH_FACTS = ["Grug hunt mammoth.", "Ugga make good fire.", "Bork find shiny stone.", "Grug think sky is blue."]
+_SEARCH_CASES = [
+    ("what grug hunt?", "Grug hunt mammoth."),
+    ("who make fire?", "Ugga make good fire."),
+    ("what bork find?", "Bork find shiny stone."),
+    ("color of sky?", "Grug think sky is blue."),
+]
+
 
-    results = db_instance.search_facts("what grug hunt?", k=1)
+@pytest.mark.parametrize("query,expected", _SEARCH_CASES)
+def test_search_facts(db_instance, query, expected):
+    db_instance.add_facts(_SEARCH_FACTS)
+
+    results = db_instance.search_facts(query, k=1)
 
     # If semantic search is available, we should get results
-    # If not available (CI environment), search returns empty list
     if hasattr(db_instance, "embedder") and db_instance.embedder is not None:
-        assert "Grug hunt mammoth." in results
-        assert len(results) == 1
+        assert results == [expected]
     else:
         # In CI environment without sentence-transformers, search is disabled
         assert results == []
 
-    if hasattr(db_instance, "embedder") and db_instance.embedder is not None:
-        results = db_instance.search_facts("who make fire?", k=1)
-        assert "Ugga make good fire." in results
 
-        results = db_instance.search_facts("what bork find?", k=1)
-        assert "Bork find shiny stone." in results
+def test_search_facts_batch(db_instance):
+    db_instance.add_facts(_SEARCH_FACTS)
+    queries = [query for query, _ in _SEARCH_CASES]
+
+    results = db_instance.search_facts_batch(queries, k=1)
 
-        results = db_instance.search_facts("color of sky?", k=1)
-        assert "Grug think sky is blue." in results
+    if hasattr(db_instance, "embedder") and db_instance.embedder is not None:
+        assert results == [[expected] for _, expected in _SEARCH_CASES]
+    else:
+        assert results == [[] for _ in queries]
+    assert db_instance.search_facts_batch([], k=1) == []
 
 
 def test_get_all_facts(db_instance):
@@ -166,22 +136,119 @@ def test_rebuild_index(db_instance):
     assert db_instance.index.ntotal == initial_ntotal
 
 
-def test_db_close(db_instance, tmp_path):
-    # The fixture handles closing, but we can test if it doesn't raise an error
-    # when called explicitly (though it's usually called once in teardown)
-    db_instance.close()
+def test_clear_facts(db_instance):
+    db_instance.add_fact("Fact one.")
+    db_instance.add_fact("Fact two.")
+    assert db_instance.clear_facts()
+    assert db_instance.get_all_facts() == []
+    # Cleared facts can be learned again
+    assert db_instance.add_fact("Fact one.")
+
+
+def test_db_close(tmp_path):
+    # Uses its own database: db_instance is shared by the whole module and must stay open
+    db_path = str(tmp_path / "test_grug_lore.db")
+    db = GrugDB(db_path)
+    db.add_fact("Fact before close.")
+    db.close()
     # Re-initializing to ensure it can be opened again after close
-    new_db = GrugDB(str(tmp_path / "test_grug_lore_new.db"))
-    assert new_db is not None
+    new_db = GrugDB(db_path)
+    assert new_db.get_all_facts() == ["Fact before close."]
     new_db.close()
 
 
-def test_invalid_db_path():
-    # Create a temporary file, then try to create a database path that would require
+def test_invalid_db_path(tmp_path):
+    # Create a regular file, then try to create a database path that would require
     # creating a directory inside this file (which should fail)
-    import tempfile
+    not_a_dir = tmp_path / "not_a_dir_file"
+    not_a_dir.touch()
+    invalid_path = str(not_a_dir) + "/subdir/db.sqlite"
+    with pytest.raises(Exception):
+        GrugDB(invalid_path)
+
+
+def _brute_force_search(vectors, queries, k):
+    """Reference L2 top-k: (distances, positions) from a full distance matrix."""
+    dists = np.linalg.norm(vectors[None, :, :] - queries[:, None, :], axis=2)
+    positions = np.argsort(dists, axis=1)[:, :k]
+    return np.take_along_axis(dists, positions, axis=1), positions
+
+
+def _assert_search_matches(index, vectors, ids, queries, k):
+    dist, found = index.search(queries, k)
+    ref_dist, ref_pos = _brute_force_search(vectors, queries, k)
+    n = min(k, len(vectors))
+    np.testing.assert_array_equal(found[:, :n], ids[ref_pos])
+    np.testing.assert_allclose(dist[:, :n], ref_dist, rtol=1e-5, atol=1e-5)
+    # Slots beyond ntotal carry no result
+    assert (found[:, n:] == -1).all()
+
+
+@pytest.fixture
+def stub_data():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((30, 8)).astype(np.float32)
+    queries = rng.standard_normal((4, 8)).astype(np.float32)
+    ids = np.arange(len(vectors), dtype=np.int64) + 100
+    return vectors, queries, ids
+
+
+@faiss_stub_only
+@pytest.mark.parametrize("k", [1, 5, 40], ids=["k1", "k5", "k_over_ntotal"])
+def test_faiss_stub_search_matches_brute_force(stub_data, k):
+    vectors, queries, ids = stub_data
+
+    index = faiss.IndexIDMap(faiss.IndexFlatL2(vectors.shape[1]))
+    # Several small adds exercise the growing buffers
+    for start in range(0, len(vectors), 7):
+        index.add_with_ids(vectors[start : start + 7], ids[start : start + 7])
+
+    assert index.ntotal == len(vectors)
+    _assert_search_matches(index, vectors, ids, queries, k)
+
+
+@faiss_stub_only
+def test_faiss_stub_empty_index(stub_data):
+    _, queries, _ = stub_data
+    index = faiss.IndexIDMap(faiss.IndexFlatL2(queries.shape[1]))
+
+    dist, found = index.search(queries, 3)
+
+    assert index.ntotal == 0
+    assert found.shape == (len(queries), 3)
+    assert (found == -1).all()
+    assert dist.shape == (len(queries), 3)
+
+
+@faiss_stub_only
+def test_faiss_stub_reset_then_add(stub_data):
+    vectors, queries, ids = stub_data
+    index = faiss.IndexIDMap(faiss.IndexFlatL2(vectors.shape[1]))
+    index.add_with_ids(vectors, ids)
+
+    index.reset()
+    assert index.ntotal == 0
+    # Only vectors added after the reset are searchable
+    index.add_with_ids(vectors[:5], ids[:5] + 1000)
+
+    assert index.ntotal == 5
+    _assert_search_matches(index, vectors[:5], ids[:5] + 1000, queries, 3)
+
+
+@faiss_stub_only
+def test_faiss_stub_write_read_roundtrip(stub_data, tmp_path):
+    vectors, queries, ids = stub_data
+    index = faiss.IndexIDMap(faiss.IndexFlatL2(vectors.shape[1]))
+    index.add_with_ids(vectors, ids)
+    path = str(tmp_path / "facts.index")
+
+    faiss.write_index(index, path)
+    loaded = faiss.read_index(path)
+
+    assert loaded.ntotal == index.ntotal
+    np.testing.assert_array_equal(loaded.ids, ids)
+    _assert_search_matches(loaded, vectors, ids, queries, 5)
 
-    with tempfile.NamedTemporaryFile() as f:
-        invalid_path = f.name + "/subdir/db.sqlite"
-        with pytest.raises(Exception):
-            GrugDB(invalid_path)
+    # An empty index survives the round trip too
+    faiss.write_index(faiss.IndexIDMap(faiss.IndexFlatL2(vectors.shape[1])), path)
+    assert faiss.read_index(path).ntotal == 0
@@ -3,49 +3,91 @@ Integration tests for GrugThink bot with proper Discord API mocking.
 These tests focus on end-to-end functionality without heavy dependencies.
 """
 
-from unittest.mock import AsyncMock, MagicMock, patch
-
-import discord
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import zlib
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+import numpy as np
 import pytest
 
-# Import after setting up mocks
-from tests.test_bot import mock_config, mock_logger
+# Skip before any src.grugthink or test_bot import, so the module is skipped rather than erroring
+discord = pytest.importorskip("discord")
+
+from src.grugthink.grug_db import GrugDB  # noqa: E402
+
+# Import after setting up mocks; reuses the bot module test_bot already imported against mock_config
+from tests.test_bot import bot, mock_config, mock_logger, set_channel_history  # noqa: E402
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Variables config.py reads; stripped from the parent environment before each scenario
+_CONFIG_ENV_VARS = {
+    "DISCORD_TOKEN",
+    "GEMINI_API_KEY",
+    "GEMINI_MODEL",
+    "OLLAMA_URLS",
+    "OLLAMA_MODELS",
+    "GOOGLE_API_KEY",
+    "GOOGLE_CSE_ID",
+    "GRUGBOT_DATA_DIR",
+    "GRUGBOT_VARIANT",
+    "TRUSTED_USER_IDS",
+    "LOAD_EMBEDDER",
+    "LOG_LEVEL",
+    "GRUGTHINK_MULTIBOT_MODE",
+}
+
+# Imports the real config in a fresh interpreter and prints the requested attributes as JSON
+_CONFIG_SCRIPT = """
+import json, sys
+from src.grugthink import config
+print(json.dumps({name: getattr(config, name) for name in sys.argv[1:]}))
+"""
+
+
+@pytest.fixture(scope="module", autouse=True)
+def patched_bot():
+    """The bot module under test, with its logger swapped for mock_logger."""
+    with patch.object(bot, "log", mock_logger):
+        yield bot
 
 
 class TestDiscordIntegration:
     """Integration tests for Discord bot functionality."""
 
-    @pytest.fixture
-    def mock_guild(self):
-        """Mock Discord guild."""
-        guild = MagicMock(spec=discord.Guild)
-        guild.id = 12345
-        guild.name = "Test Guild"
-        return guild
-
-    @pytest.fixture
-    def mock_channel(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def mock_channel(cls):
         """Mock Discord text channel."""
+        # history() is installed once by mock_interaction
         channel = AsyncMock(spec=discord.TextChannel)
         channel.id = 67890
         channel.name = "test-channel"
         return channel
 
-    @pytest.fixture
-    def mock_user(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def mock_user(cls):
         """Mock Discord user."""
-        user = MagicMock(spec=discord.User)
-        user.id = 12345  # Trusted user ID from config
-        user.name = "TestUser"
-        user.bot = False
-        return user
-
-    @pytest.fixture
-    def mock_interaction(self, mock_user, mock_channel):
+        # Plain attribute bag: the bot only reads it, never calls it
+        return SimpleNamespace(id=12345, name="TestUser", bot=False)  # Trusted user ID from config
+
+    @pytest.fixture(scope="class")
+    @classmethod
+    def mock_interaction(cls, mock_user, mock_channel, mock_message):
         """Mock Discord interaction."""
-        interaction = AsyncMock(spec=discord.Interaction)
+        interaction = AsyncMock()
         interaction.user = mock_user
         interaction.channel = mock_channel
+        # Replays the shared message on every history() call; reset_mock leaves it in place
+        set_channel_history(interaction, [mock_message])
         interaction.guild_id = 12345
         interaction.response = AsyncMock()
         interaction.followup = AsyncMock()
@@ -56,176 +98,190 @@ class TestDiscordIntegration:
 
         return interaction
 
-    @pytest.fixture
-    def mock_message(self, mock_user, mock_channel):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def mock_message(cls, mock_user, mock_channel):
         """Mock Discord message."""
-        message = MagicMock(spec=discord.Message)
-        message.author = mock_user
-        message.channel = mock_channel
-        message.content = "The sky is blue today."
-        message.id = 98765
-        return message
-
-    @pytest.fixture
-    def bot_cog_integration(self):
-        """Create a bot cog for integration testing."""
-        # Create mock personality
-        mock_personality = MagicMock()
-        mock_personality.response_style = "caveman"
-        mock_personality.chosen_name = None
-        mock_personality.name = "Grug"
-
-        # Create mock personality engine
-        mock_personality_engine = MagicMock()
-        mock_personality_engine.get_personality.return_value = mock_personality
-        mock_personality_engine.get_response_with_style.return_value = "TRUE - Grug say sky blue sometimes."
-        mock_personality_engine.get_error_message.return_value = "Grug brain hurt. No can answer."
+        return SimpleNamespace(id=98765, author=mock_user, channel=mock_channel, content="The sky is blue today.")
 
+    @pytest.fixture(autouse=True)
+    def reset_shared_mocks(self, mock_user, mock_channel, mock_interaction, mock_message):
+        """Undo per-test changes to the class-scoped mocks."""
+        mock_user.id = 12345
+        mock_user.bot = False
+        mock_interaction.guild_id = 12345
+        mock_message.content = "The sky is blue today."
+        # reset_mock keeps return values, so followup.send still returns an editable message
+        mock_interaction.reset_mock()
+        mock_channel.reset_mock()
+
+    @pytest.fixture(scope="class")
+    @classmethod
+    def personality_engine(cls):
+        """Mock personality engine serving a fixed caveman personality."""
+        personality = SimpleNamespace(response_style="caveman", chosen_name=None, name="Grug")
+        engine = MagicMock()
+        engine.get_personality.return_value = personality
+        engine.get_response_with_style.return_value = "TRUE - Grug say sky blue sometimes."
+        engine.get_error_message.return_value = "Grug brain hurt. No can answer."
+        return engine
+
+    @pytest.fixture(scope="class")
+    @classmethod
+    def bot_cog_integration(cls, patched_bot, personality_engine):
+        """Create a bot cog for integration testing."""
         # Create mock bot instance
         mock_client = AsyncMock()
         mock_bot_instance = MagicMock()
-        mock_bot_instance.personality_engine = mock_personality_engine
+        mock_bot_instance.personality_engine = personality_engine
         mock_bot_instance.db = MagicMock()
         mock_bot_instance.config = MagicMock(bot_id="test-bot")
 
-        with (
-            patch.dict("sys.modules", {"src.grugthink.config": mock_config, "src.grugthink.grug_db": MagicMock()}),
-            patch("src.grugthink.bot.log", mock_logger),
-        ):
-            from src.grugthink import bot
+        return patched_bot.GrugThinkBot(mock_client, mock_bot_instance)
 
-            return bot.GrugThinkBot(mock_client, mock_bot_instance)
+    @pytest.fixture(autouse=True)
+    def reset_cooldowns(self):
+        """Start and leave every test with an empty rate-limit table."""
+        bot.user_cooldowns.clear()
+        yield
+        bot.user_cooldowns.clear()
 
     @pytest.mark.asyncio
-    async def test_verify_command_integration(self, bot_cog_integration, mock_interaction, mock_message):
-        """Test the verify command end-to-end."""
-        # Setup mock responses
-        mock_interaction.channel.history.return_value.__aiter__.return_value = [mock_message]
-
-        # Mock the executor
-        async def mock_executor(executor, func, *args):
-            return "TRUE - Grug say sky blue sometimes."
-
-        with (
-            patch("src.grugthink.bot.get_server_db") as mock_get_server_db,
-            patch("asyncio.get_running_loop") as mock_loop,
-            patch("src.grugthink.bot.is_rate_limited", return_value=False),
-        ):
-            server_db_mock = MagicMock()
-            server_db_mock.search_facts.return_value = []
-            mock_get_server_db.return_value = server_db_mock
-            mock_loop.return_value.run_in_executor = mock_executor
-
-            # Execute the command
+    @pytest.mark.parametrize("scenario", ["verify", "learn", "rate_limited", "untrusted_learn"])
+    async def test_command_integration(self, scenario, bot_cog_integration, mock_interaction, monkeypatch):
+        """Run the verify and learn commands end-to-end for each scenario."""
+        # The executor hands back an already-resolved future; awaiting it needs no new coroutine
+        executor_result = asyncio.get_running_loop().create_future()
+        executor_result.set_result("TRUE - Grug say sky blue sometimes.")
+
+        server_db_mock = MagicMock()
+        server_db_mock.search_facts.return_value = []
+        server_db_mock.add_fact.return_value = True
+
+        # The cog resolves its DB through its own get_server_db, so patch it on the instance
+        monkeypatch.setattr(bot_cog_integration, "get_server_db", MagicMock(return_value=server_db_mock))
+        mock_loop = MagicMock()
+        mock_loop.return_value.run_in_executor = MagicMock(return_value=executor_result)
+        monkeypatch.setattr(asyncio, "get_running_loop", mock_loop)
+
+        # Compare (await_count, await_args) directly rather than via assert_called_once_with
+        defer = mock_interaction.response.defer
+        send = mock_interaction.followup.send
+
+        if scenario == "verify":
             await bot_cog_integration.verify.callback(bot_cog_integration, mock_interaction)
 
-            # Verify interaction flow
-            mock_interaction.response.defer.assert_called_once_with(ephemeral=False)
-            mock_interaction.followup.send.assert_called_once_with("Grug thinking...", ephemeral=False)
-
-    @pytest.mark.asyncio
-    async def test_learn_command_integration(self, bot_cog_integration, mock_interaction):
-        """Test the learn command end-to-end."""
-        # Make user trusted
-        mock_interaction.user.id = 12345
-
-        with (
-            patch("src.grugthink.bot.get_server_db") as mock_get_server_db,
-            patch("src.grugthink.bot.config") as bot_config,
-        ):
-            server_db_mock = MagicMock()
-            server_db_mock.add_fact.return_value = True
-            mock_get_server_db.return_value = server_db_mock
-            bot_config.TRUSTED_USER_IDS = [12345]
-
-            # Execute the command
-            await bot_cog_integration.learn.callback(bot_cog_integration, mock_interaction, "Grug love mammoth meat.")
-
-            # Verify interaction flow
-            mock_interaction.response.defer.assert_called_once_with(ephemeral=True)
-            mock_interaction.followup.send.assert_called_once_with(
-                "Grug learn: Grug love mammoth meat.", ephemeral=True
+            assert (defer.await_count, defer.await_args) == (1, call(ephemeral=False))
+            assert (send.await_count, send.await_args) == (1, call("Grug thinking...", ephemeral=False))
+            # The thinking message is edited with the executor's result
+            assert send.return_value.edit.await_args == call(
+                content="Verification: TRUE - Grug say sky blue sometimes."
             )
+        elif scenario == "rate_limited":
+            # Last request 4 seconds ago is inside the 5 second cooldown
+            key = f"{mock_interaction.user.id}:{bot_cog_integration.get_bot_id()}"
+            bot.user_cooldowns[key] = time.time() - 4
 
-    @pytest.fixture(autouse=True)
-    def mock_user_cooldowns(self):
-        with patch("src.grugthink.bot.user_cooldowns", {}) as mock_cooldowns:
-            yield mock_cooldowns
-
-    @pytest.mark.asyncio
-    async def test_rate_limiting_integration(
-        self, bot_cog_integration, mock_interaction, mock_message, mock_user_cooldowns
-    ):
-        """Test rate limiting functionality."""
-        import time
+            await bot_cog_integration.verify.callback(bot_cog_integration, mock_interaction)
 
-        # Configure bot_id on the mock
-        bot_cog_integration.bot_instance.config.bot_id = "test-bot"
+            send_message = mock_interaction.response.send_message
+            assert (send_message.await_count, send_message.await_args) == (
+                1,
+                call("Slow down! Wait a few seconds.", ephemeral=True),
+            )
+        elif scenario == "learn":
+            await bot_cog_integration.learn.callback(bot_cog_integration, mock_interaction, "Grug love mammoth meat.")
 
-        # Setup mock responses - ensure message is not from bot and has content
-        mock_message.author.bot = False
-        mock_message.content = "Test message content"
-        mock_interaction.channel.history.return_value.__aiter__.return_value = [mock_message]
+            assert (defer.await_count, defer.await_args) == (1, call(ephemeral=True))
+            assert (send.await_count, send.await_args) == (
+                1,
+                call("Grug learn: Grug love mammoth meat.", ephemeral=True),
+            )
+            assert server_db_mock.add_fact.call_args == call("Grug love mammoth meat.")
+        else:
+            mock_interaction.user.id = 99999  # mock_config only trusts 12345
 
-        bot_id = bot_cog_integration.get_bot_id()
-        key = f"{mock_interaction.user.id}:{bot_id}"
+            await bot_cog_integration.learn.callback(bot_cog_integration, mock_interaction, "Untrusted fact.")
 
-        # Set cooldown to a recent time (e.g., 4 seconds ago) to trigger rate limit
-        mock_user_cooldowns[key] = time.time() - 4
+            assert (defer.await_count, defer.await_args) == (1, call(ephemeral=True))
+            assert (send.await_count, send.await_args) == (1, call("You not trusted to teach Grug.", ephemeral=True))
 
-        # Execute the command
-        await bot_cog_integration.verify.callback(bot_cog_integration, mock_interaction)
 
-        # Should be rate limited
-        mock_interaction.response.send_message.assert_called_once_with("Slow down! Wait a few seconds.", ephemeral=True)
+class _WordHashEmbedder:
+    """Deterministic bag-of-words embedder, so search runs without downloading a model."""
 
-    @pytest.mark.asyncio
-    async def test_untrusted_user_learn_integration(self, bot_cog_integration, mock_interaction):
-        """Test learn command with untrusted user."""
-        # Ensure guild_id is set
-        mock_interaction.guild_id = 12345
-        mock_interaction.user.id = 99999  # Make user untrusted
+    def __init__(self, dimension):
+        self.dimension = dimension
 
-        with patch("src.grugthink.bot.config") as bot_config:
-            bot_config.TRUSTED_USER_IDS = [12345]  # User 99999 is not in this list
+    def encode(self, texts, batch_size=None):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in zip(vectors, texts):
+            for word in re.findall(r"\w+", text.lower()):
+                row[zlib.crc32(word.encode()) % self.dimension] += 1.0
+            row /= max(np.linalg.norm(row), 1.0)
+        return vectors
 
-            # Execute the command
-            await bot_cog_integration.learn.callback(bot_cog_integration, mock_interaction, "Untrusted fact.")
 
-            # Verify rejection
-            mock_interaction.response.defer.assert_called_once_with(ephemeral=True)
-            mock_interaction.followup.send.assert_called_once_with("You not trusted to teach Grug.", ephemeral=True)
+@pytest.fixture(scope="module")
+def grug_db(tmp_path_factory):
+    db = GrugDB(str(tmp_path_factory.mktemp("grug_integration") / "grug_lore.db"), load_embedder=False)
+    # Match the dimension the index was built with
+    db.embedder = _WordHashEmbedder(db.dimension)
+    yield db
+    db.close()
 
 
 class TestDatabaseIntegration:
     """Integration tests for database functionality."""
 
-    @pytest.mark.asyncio
-    async def test_database_search_integration(self):
-        """Test database search integration."""
-        with (
-            patch.dict("sys.modules", {"src.grugthink.config": mock_config}),
-            patch("src.grugthink.bot.log", mock_logger),
-        ):
-            # Mock database
-            mock_db = MagicMock()
-            mock_db.search_facts.return_value = ["Grug know fire good.", "Grug hunt mammoth."]
-
-            # Test search functionality
-            results = mock_db.search_facts("fire", k=5)
-            assert len(results) == 2
-            assert "fire good" in results[0]
+    def test_database_search_integration(self, grug_db):
+        """Test that facts written to a real GrugDB come back from semantic search."""
+        assert grug_db.add_facts(["Grug know fire good.", "Grug hunt mammoth."]) == 2
+
+        assert grug_db.search_facts("fire", k=1) == ["Grug know fire good."]
+        assert grug_db.search_facts_batch(["mammoth", "fire"], k=1) == [
+            ["Grug hunt mammoth."],
+            ["Grug know fire good."],
+        ]
 
 
 class TestConfigurationIntegration:
     """Integration tests for configuration handling."""
 
-    def test_config_loading_integration(self):
+    def test_config_loading_integration(self, patched_bot):
         """Test configuration loading integration."""
-        with patch.dict("sys.modules", {"src.grugthink.config": mock_config}):
-            from src.grugthink import bot
-
-            # Verify config is accessible
-            assert hasattr(bot, "config") or mock_config.DISCORD_TOKEN == "fake_token"
-            assert mock_config.TRUSTED_USER_IDS == [12345]
-            assert mock_config.USE_GEMINI is True
+        # Verify the bot sees the mocked config
+        assert patched_bot.config is mock_config
+        assert mock_config.TRUSTED_USER_IDS == [12345]
+        assert mock_config.USE_GEMINI is True
+
+    @pytest.mark.parametrize(
+        "env,expected",
+        [
+            pytest.param(
+                {"DISCORD_TOKEN": "fake_token", "GEMINI_API_KEY": "fake_gemini_key", "TRUSTED_USER_IDS": "12345"},
+                {"USE_GEMINI": True, "TRUSTED_USER_IDS": [12345]},
+                id="gemini",
+            ),
+            pytest.param(
+                {"DISCORD_TOKEN": "fake_token", "OLLAMA_URLS": "http://localhost:11434"},
+                {"USE_GEMINI": False, "OLLAMA_URLS": ["http://localhost:11434"], "TRUSTED_USER_IDS": []},
+                id="ollama",
+            ),
+        ],
+    )
+    def test_config_env_loading(self, env, expected):
+        """Load the real config from the environment in a subprocess."""
+        # A separate interpreter keeps env vars and sys.modules of this process untouched,
+        # so the scenarios are safe to run in parallel workers
+        base_env = {var: value for var, value in os.environ.items() if var not in _CONFIG_ENV_VARS}
+        result = subprocess.run(
+            [sys.executable, "-c", _CONFIG_SCRIPT, *expected],
+            env={**base_env, **env},
+            cwd=_REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # The JSON line is last, after anything the package logs at import time
+        assert json.loads(result.stdout.strip().splitlines()[-1]) == expected